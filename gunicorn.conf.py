@@ -0,0 +1,70 @@
+import ctypes
+import os
+
+# The app imports from src/ (e.g. "from routes.health import health_bp")
+chdir = "src"
+# Thread pools and warm-up are left to post_worker_init below
+wsgi_app = "main:create_app(warm_up=False)"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Worker process count. Set in the environment, before the app is imported, so
+# the app's thread pools get each process's share of the cores (config.Settings).
+os.environ.setdefault("WEB_CONCURRENCY", "2")
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def _nvidia_gpu_present() -> bool:
+    # Ask NVML, as torch does with PYTORCH_NVML_BASED_CUDA_CHECK, so the master
+    # never initialises CUDA or imports the app just to find out
+    try:
+        nvml = ctypes.CDLL("libnvidia-ml.so.1")
+    except OSError:
+        return False
+    if nvml.nvmlInit_v2() != 0:
+        return False
+    try:
+        count = ctypes.c_uint()
+        return nvml.nvmlDeviceGetCount_v2(ctypes.byref(count)) == 0 and count.value > 0
+    finally:
+        nvml.nvmlShutdown()
+
+
+def _uses_gpu() -> bool:
+    # Same resolution as config.Settings and services._models._use_cuda_for_ocr
+    if _env_flag("USE_GPU", False):
+        return True
+    device = os.getenv("KYC_OCR_DEVICE", "auto").lower()
+    if device != "auto":
+        return device == "cuda"
+    return _nvidia_gpu_present()
+
+
+# Build the app and load the model weights in the master so forked workers
+# share them copy-on-write. CUDA can't be initialised before a fork, so
+# preloading is off by default when OCR or face detection uses the GPU;
+# GUNICORN_PRELOAD overrides either way.
+preload_app = _env_flag("GUNICORN_PRELOAD", not _uses_gpu())
+
+
+def post_worker_init(worker):
+    # Thread pools and inference warm-up run in each worker, never in the
+    # master: libgomp can't fork once its thread pool has run
+    from main import init_worker
+
+    init_worker()
+
+
+# Requests are CPU-bound model work that already fans out over CV_POOL, so keep
+# the process count low and use threads for concurrent I/O
+workers = int(os.environ["WEB_CONCURRENCY"])
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Model warm-up and OCR on large uploads can exceed the 30s default
+timeout = 120
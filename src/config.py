@@ -0,0 +1,63 @@
+import functools
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Runtime configuration read from environment variables.
+    """
+    # Run dlib face detection on CUDA; with OCR_DEVICE "auto" it also puts EasyOCR on CUDA
+    USE_GPU: bool = False
+    # EasyOCR device: "auto" (CUDA when available), "cpu" or "cuda"
+    OCR_DEVICE: str = "auto"
+    # Server processes sharing the machine (gunicorn workers); thread pools are
+    # sized to each process's share of the cores
+    WEB_CONCURRENCY: int = 1
+    # Maximum EasyOCR forward passes running at once across request threads
+    MAX_CONCURRENT_OCR: int = 2
+    # int8 dynamic quantization of the EasyOCR models on CPU
+    OCR_QUANTIZE: bool = True
+    # Merge OCR from concurrent requests for up to this long (0 disables batching)
+    OCR_BATCH_WAIT_MS: int = 0
+    # Maximum images per merged OCR batch
+    OCR_BATCH_MAX_SIZE: int = 8
+    # Optional res10 SSD face detector (deploy.prototxt + caffemodel)
+    FACE_DETECTOR_PROTOTXT: Optional[str] = None
+    FACE_DETECTOR_MODEL: Optional[str] = None
+    FACE_DETECTOR_CONFIDENCE: float = 0.5
+    # Run the SSD face detector through OpenCV's OpenCL backend when a device is available
+    FACE_DETECTOR_OPENCL: bool = False
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            USE_GPU=_env_bool("USE_GPU", cls.USE_GPU),
+            OCR_DEVICE=os.getenv("KYC_OCR_DEVICE", cls.OCR_DEVICE).lower(),
+            WEB_CONCURRENCY=int(os.getenv("WEB_CONCURRENCY", cls.WEB_CONCURRENCY)),
+            MAX_CONCURRENT_OCR=int(os.getenv("MAX_CONCURRENT_OCR", cls.MAX_CONCURRENT_OCR)),
+            OCR_QUANTIZE=_env_bool("OCR_QUANTIZE", cls.OCR_QUANTIZE),
+            OCR_BATCH_WAIT_MS=int(os.getenv("OCR_BATCH_WAIT_MS", cls.OCR_BATCH_WAIT_MS)),
+            OCR_BATCH_MAX_SIZE=int(os.getenv("OCR_BATCH_MAX_SIZE", cls.OCR_BATCH_MAX_SIZE)),
+            FACE_DETECTOR_PROTOTXT=os.getenv("FACE_DETECTOR_PROTOTXT"),
+            FACE_DETECTOR_MODEL=os.getenv("FACE_DETECTOR_MODEL"),
+            FACE_DETECTOR_CONFIDENCE=float(os.getenv("FACE_DETECTOR_CONFIDENCE", cls.FACE_DETECTOR_CONFIDENCE)),
+            FACE_DETECTOR_OPENCL=_env_bool("FACE_DETECTOR_OPENCL", cls.FACE_DETECTOR_OPENCL),
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings, parsing the environment only once.
+    """
+    return Settings.from_env()
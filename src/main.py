@@ -1,11 +1,41 @@
+import os
+
+# Run native libraries single-threaded by default; concurrency comes from CV_POOL
+# instead, and init_worker() sizes the torch pool for the OCR passes.
+# Must be set before numpy/torch/cv2 are imported by the routes below.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+# Let torch.cuda.is_available() answer through NVML instead of initialising CUDA,
+# so a gunicorn master can check for a GPU and still fork usable workers.
+os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+
+import cv2
+import torch
 from flask import Flask
+from config import get_settings
+from services import face_service, ocr_service
+from services._models import get_reader
 from routes.health import health_bp
 from routes.face_validation import face_bp
 from routes.ocr_validation import ocr_bp
 from routes.phone_validation import phone_bp
 from routes.kyc import kyc_bp
-def create_app():
+from utils.json_provider import OrjsonProvider
+from utils.workers import cores_per_process
+def create_app(warm_up: bool = True):
+    """
+    Build the Flask app and load the OCR models.
+
+    Under gunicorn the app is built with warm_up=False, possibly in the master
+    before workers fork (preload), and gunicorn.conf.py calls init_worker() in
+    each worker instead.
+    """
+    # Loading the weights here lets preloaded workers share them copy-on-write
+    get_reader()
+    if warm_up:
+        init_worker()
+
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
 
     # Register routes
     app.register_blueprint(health_bp)
@@ -16,6 +46,26 @@ def create_app():
 
     return app
 
+
+def init_worker():
+    """
+    Size the native thread pools and warm the models in a serving process.
+
+    Runs after any fork: libgomp's thread pool (used by torch's Linux wheels)
+    doesn't survive a fork once a parallel region has run, so neither the
+    thread counts nor inference may happen in a preloading master.
+    """
+    cv2.setNumThreads(int(os.environ["OMP_NUM_THREADS"]))
+    # At most MAX_CONCURRENT_OCR EasyOCR passes run at once; give each its share
+    # of the cores rather than pinning OCR to a single core
+    torch.set_num_threads(max(1, cores_per_process() // get_settings().MAX_CONCURRENT_OCR))
+
+    # Warm the models before serving so request #1 is as fast as request #N
+    ocr_service.warm_up()
+    face_service.warm_up()
+
+
 if __name__ == "__main__":
+    # Local development only; production runs under gunicorn (see gunicorn.conf.py)
     app = create_app()
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    app.run(host="0.0.0.0", port=5000, debug=os.getenv("FLASK_DEBUG") == "1")
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.face_service import compare_faces
+from utils.image_utils import read_upload, release_upload
 
 face_bp = Blueprint("face_validation", __name__)
 
@@ -11,14 +12,18 @@ def validate_face():
     if "image1" not in request.files or "image2" not in request.files:
         return jsonify({"error": "Please upload both image1 and image2"}), 400
 
-    image1 = request.files["image1"].read()
-    image2 = request.files["image2"].read()
-
+    uploads = []
     try:
-        match = compare_faces(image1, image2)
+        # Track each buffer as soon as it exists so a failed later read still releases it
+        for name in ("image1", "image2"):
+            uploads.append(read_upload(request.files[name]))
+        match = compare_faces(*uploads)
         return jsonify({
             "match": match,
             "message": "Faces match" if match else "Faces do not match"
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        for upload in uploads:
+            release_upload(upload)
@@ -1,18 +1,96 @@
 from flask import Blueprint, request, jsonify
-import phonenumbers
-import easyocr
-import face_recognition
 import numpy as np
-from PIL import Image
-import io
 import re
+from services.face_service import best_face_match, cached_face_encodings, face_encodings, prepare_for_face
+from services.ocr_service import extract_text_easyocr_batch
+from services.phone_service import validate_phone_number
+from utils.image_utils import decode_rgb, read_upload, release_upload
+from utils.workers import CV_POOL
 
 kyc_bp = Blueprint('kyc', __name__)
 
-reader = easyocr.Reader(['en'])
+# Field patterns, compiled once per process (Kenyan ID numbers are 7-8 digits)
+# [0-9] rather than \d, which also matches non-ASCII digits such as "١٢٣"
+RE_ID_DIGITS = re.compile(r'\b[0-9]{7,8}\b')
+RE_ID_NUMBER = re.compile(r'[0-9]{7,8}')
+RE_NAME = re.compile(r'(?:NAME|FULL NAMES?)[\s:]*([A-Z\s]+)(?=DATE|$|ID)')
+
+
+def _match_faces(selfie_content: bytes, id_array: np.ndarray):
+    """
+    Compare the selfie against the already decoded ID front photo.
+
+    Returns:
+        tuple: (is_match, confidence, message)
+    """
+    try:
+        selfie_array = prepare_for_face(decode_rgb(selfie_content))
+        id_array = prepare_for_face(id_array)
+
+        # Get face encodings
+        selfie_encodings = face_encodings(selfie_array)
+        id_encodings = cached_face_encodings(id_array)
+
+        if not selfie_encodings or not id_encodings:
+            return False, 0.0, "No faces detected in one or both images"
+
+        # Compare every detected face pair and keep the closest one
+        face_match_result, face_distance = best_face_match(id_encodings, selfie_encodings)
+        confidence = round((1 - face_distance) * 100, 2)
+        face_message = f"Faces match with {confidence}% confidence" if face_match_result else "Faces do not match"
+        return face_match_result, confidence, face_message
+
+    except Exception as e:
+        return False, 0.0, f"Error during face recognition: {str(e)}"
+
+
+def _build_response(name, id_number, phone_number, is_valid_phone, normalized_phone,
+                    id_pattern_matched, extracted_data,
+                    face_match_result, confidence, face_message, name_match,
+                    message="Validation completed successfully") -> dict:
+    """
+    Assemble the validate-kyc response body.
+
+    Checks that were skipped are passed (and reported) as None rather than False.
+    """
+    return {
+        "status": "success",
+        "message": message,
+        "is_verified": all([
+            id_pattern_matched,
+            face_match_result,
+            is_valid_phone
+        ]),
+        "data": {
+            "name": name,
+            "id_number": id_number,
+            "phone_number": normalized_phone or phone_number
+        },
+        "validation_details": {
+            "id_validation": {
+                "id_number_valid": id_pattern_matched,
+                "id_pattern_matched": id_pattern_matched,
+                "extracted_data": extracted_data
+            },
+            "face_match": {
+                "is_match": face_match_result,
+                "confidence": confidence,
+                "message": face_message
+            },
+            "phone_validation": {
+                "is_valid": is_valid_phone,
+                "message": "Valid phone number" if is_valid_phone else "Invalid phone number",
+                "normalized_number": normalized_phone
+            },
+            "name_match": name_match,
+            "ocr_extracted_data": extracted_data
+        }
+    }
+
 
 @kyc_bp.route('/api/validate-kyc', methods=['POST'])
 def validate_kyc():
+    uploads = []
     try:
         # --- 1️⃣ Get Form Data ---
         name = request.form.get('name')
@@ -26,35 +104,63 @@ def validate_kyc():
         if not all([name, id_number, phone_number, selfie, id_front, id_back]):
             return jsonify({"status": "error", "message": "Missing required fields"}), 400
 
+        # Normalise once so the format check, OCR comparison and response agree
+        id_number = id_number.strip()
+
         # --- 2️⃣ Phone validation ---
+        phone_result = validate_phone_number(phone_number, None)
+        is_valid_phone = phone_result.get("is_valid", False)
+        normalized_phone = phone_result.get("e164_format")
+
+        # Cheap checks gate the OCR/face models: a request that is going to fail on
+        # its ID number format or phone number never pays for them
+        if not RE_ID_NUMBER.fullmatch(id_number):
+            return jsonify({"status": "error", "message": "ID number must be 7 or 8 digits"}), 400
+
+        if not is_valid_phone:
+            skipped_data = {
+                "id_number": None,
+                "full_name": None,
+                "date_of_birth": None,
+                "gender": None,
+                "other_details": {}
+            }
+            return jsonify(_build_response(
+                name, id_number, phone_number, is_valid_phone, normalized_phone,
+                None, skipped_data,
+                None, None, "Skipped: phone number is invalid", None,
+                message="Phone number is invalid; ID, face and name checks were skipped"
+            )), 200
+
+        # --- 3️⃣ Read all file content first (mapped, not copied, when spooled to disk) ---
+        # Track each buffer as soon as it exists so a failed later read still releases it
+        for upload in (selfie, id_front, id_back):
+            uploads.append(read_upload(upload))
+        selfie_content, id_front_content, id_back_content = uploads
+
+        # Decode the ID front once; both OCR and face recognition use it
         try:
-            parsed_phone = phonenumbers.parse(phone_number, None)
-            is_valid_phone = phonenumbers.is_valid_number(parsed_phone)
-            normalized_phone = phonenumbers.format_number(parsed_phone, phonenumbers.PhoneNumberFormat.E164)
-        except Exception:
-            is_valid_phone = False
-            normalized_phone = None
-
-        # --- 3️⃣ Read all file content into memory first ---
-        selfie_content = selfie.read()
-        id_front_content = id_front.read()
-        id_back_content = id_back.read()
+            front_img = decode_rgb(id_front_content)
+        except Exception as e:
+            return jsonify({
+                "status": "error",
+                "message": f"Error processing ID images: {str(e)}"
+            }), 400
+
+        # OCR of both ID sides (one batched pass) and face recognition are independent,
+        # so run them at once; the back and the selfie are decoded inside their workers
+        ocr_future = CV_POOL.submit(extract_text_easyocr_batch, [front_img, id_back_content])
+        face_future = CV_POOL.submit(_match_faces, selfie_content, front_img)
 
         # --- 4️⃣ OCR on ID front/back ---
         try:
-            # Process front ID
-            front_img = Image.open(io.BytesIO(id_front_content))
-            ocr_text_front = " ".join(reader.readtext(np.array(front_img), detail=0))
-            
-            # Process back ID
-            back_img = Image.open(io.BytesIO(id_back_content))
-            ocr_text_back = " ".join(reader.readtext(np.array(back_img), detail=0))
-            
+            ocr_text_front, ocr_text_back = ocr_future.result()
+
             combined_text = (ocr_text_front + " " + ocr_text_back).upper()
 
             # Extract ID and name heuristically
-            extracted_id_match = re.search(r'\b\d{7,8}\b', combined_text)
-            extracted_name_match = re.search(r'(?:NAME|FULL NAMES?)[\s:]*([A-Z\s]+)(?=DATE|$|ID)', combined_text)
+            extracted_id_match = RE_ID_DIGITS.search(combined_text)
+            extracted_name_match = RE_NAME.search(combined_text)
 
             extracted_data = {
                 "id_number": extracted_id_match.group(0) if extracted_id_match else None,
@@ -71,82 +177,25 @@ def validate_kyc():
                 "message": f"Error processing ID images: {str(e)}"
             }), 400
 
-        # --- 5️⃣ Face recognition ---
-        try:
-            # Reload images for face recognition
-            selfie_img = Image.open(io.BytesIO(selfie_content)).convert('RGB')
-            id_img = Image.open(io.BytesIO(id_front_content)).convert('RGB')
-            
-            # Convert to numpy arrays
-            selfie_array = np.array(selfie_img)
-            id_array = np.array(id_img)
-            
-            # Get face encodings
-            selfie_encodings = face_recognition.face_encodings(selfie_array)
-            id_encodings = face_recognition.face_encodings(id_array)
-
-            if not selfie_encodings or not id_encodings:
-                face_match_result = False
-                confidence = 0.0
-                face_message = "No faces detected in one or both images"
-            else:
-                # Compare the first face found in each image
-                match_results = face_recognition.compare_faces(
-                    [id_encodings[0]], 
-                    selfie_encodings[0]
-                )
-                face_distance = face_recognition.face_distance(
-                    [id_encodings[0]], 
-                    selfie_encodings[0]
-                )[0]
-                confidence = round((1 - face_distance) * 100, 2)
-                face_match_result = bool(match_results[0])
-                face_message = f"Faces match with {confidence}% confidence" if face_match_result else "Faces do not match"
-                
-        except Exception as e:
-            face_match_result = False
-            confidence = 0.0
-            face_message = f"Error during face recognition: {str(e)}"
-            
-        # --- 6️⃣ Build response ---
-        response = {
-            "status": "success",
-            "message": "Validation completed successfully",
-            "is_verified": all([
-                id_pattern_matched,
-                face_match_result,
-                is_valid_phone
-            ]),
-            "data": {
-                "name": name,
-                "id_number": id_number,
-                "phone_number": normalized_phone or phone_number
-            },
-            "validation_details": {
-                "id_validation": {
-                    "id_number_valid": id_pattern_matched,
-                    "id_pattern_matched": id_pattern_matched,
-                    "extracted_data": extracted_data
-                },
-                "face_match": {
-                    "is_match": face_match_result,
-                    "confidence": confidence,
-                    "message": face_message
-                },
-                "phone_validation": {
-                    "is_valid": is_valid_phone,
-                    "message": "Valid phone number" if is_valid_phone else "Invalid phone number",
-                    "normalized_number": normalized_phone
-                },
-                "name_match": extracted_data["full_name"].lower() in name.lower(),
-                "ocr_extracted_data": extracted_data
-            }
-        }
+        # --- 5️⃣ Face recognition (ran alongside OCR, handles its own errors) ---
+        face_match_result, confidence, face_message = face_future.result()
 
-        return jsonify(response), 200
+        # Every word of the name read off the ID must be a whole word of the submitted
+        # name, so "Doe John" still matches "John Doe" but "Ann" doesn't match "Joanne"
+        name_match = set(extracted_data["full_name"].casefold().split()) <= set(name.casefold().split())
+
+        # --- 6️⃣ Build response ---
+        return jsonify(_build_response(
+            name, id_number, phone_number, is_valid_phone, normalized_phone,
+            id_pattern_matched, extracted_data,
+            face_match_result, confidence, face_message, name_match
+        )), 200
 
     except Exception as e:
         return jsonify({
             "status": "error",
             "message": f"An error occurred during validation: {str(e)}"
         }), 500
+    finally:
+        for upload in uploads:
+            release_upload(upload)
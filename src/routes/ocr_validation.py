@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.ocr_service import extract_text_easyocr, parse_id_info
+from utils.image_utils import read_upload, release_upload
 
 
 ocr_bp = Blueprint("ocr_validation", __name__)
@@ -13,7 +14,7 @@ def extract_text():
     if "image" not in request.files:
         return jsonify({"error": "Please upload an image file"}), 400
 
-    image_bytes = request.files["image"].read()
+    image_bytes = read_upload(request.files["image"])
 
     try:
         # Extract text using EasyOCR
@@ -33,3 +34,5 @@ def extract_text():
             "error": str(e),
             "message": "Error processing ID card"
         }), 500
+    finally:
+        release_upload(image_bytes)
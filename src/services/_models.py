@@ -0,0 +1,35 @@
+import functools
+
+import easyocr
+import torch
+
+from config import get_settings
+
+
+@functools.lru_cache(maxsize=1)
+def get_reader() -> easyocr.Reader:
+    """
+    Return the process-wide EasyOCR reader, building it on first use.
+
+    Every route and service shares this one instance, so the detector and
+    recognizer weights are loaded once per process. create_app() builds it,
+    which under gunicorn --preload happens in the master before workers fork,
+    letting them share the weight pages copy-on-write; inference only starts
+    in the workers (main.init_worker).
+    """
+    settings = get_settings()
+    gpu = _use_cuda_for_ocr(settings)
+    return easyocr.Reader(
+        ['en'],
+        gpu=gpu,
+        quantize=settings.OCR_QUANTIZE,  # int8 on CPU unless OCR_QUANTIZE=false
+        cudnn_benchmark=gpu,  # batches share one input size, so cuDNN tuning pays off
+    )
+
+
+def _use_cuda_for_ocr(settings) -> bool:
+    if settings.OCR_DEVICE == "cpu":
+        return False
+    if settings.OCR_DEVICE == "cuda":
+        return True
+    return settings.USE_GPU or torch.cuda.is_available()
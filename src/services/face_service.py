@@ -1,23 +1,190 @@
 import face_recognition
-from PIL import Image
+import cv2
 import numpy as np
-import io
 import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from config import get_settings
+from utils.image_utils import decode_rgb, resize_longest
+
+settings = get_settings()
+
+# dlib's CNN detector is only worth using when dlib was built with CUDA
+FACE_LOCATION_MODEL = "cnn" if settings.USE_GPU else "hog"
+
+# Same default tolerance as face_recognition.compare_faces
+FACE_MATCH_TOLERANCE = 0.6
+
+# HOG face detection cost grows with pixel count; 800px keeps ID portraits detectable
+FACE_MAX_SIDE = 800
+
+# Optional SSD face detector (res10_300x300_ssd_iter_140000.caffemodel + deploy.prototxt).
+# When the model files aren't configured, detection falls back to dlib.
+face_net = None
+if settings.FACE_DETECTOR_PROTOTXT and settings.FACE_DETECTOR_MODEL:
+    face_net = cv2.dnn.readNetFromCaffe(settings.FACE_DETECTOR_PROTOTXT, settings.FACE_DETECTOR_MODEL)
+    face_net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    if settings.FACE_DETECTOR_OPENCL and cv2.ocl.haveOpenCL():
+        cv2.ocl.setUseOpenCL(True)
+        face_net.setPreferableTarget(cv2.dnn.DNN_TARGET_OPENCL)
+    else:
+        face_net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+# cv2.dnn.Net keeps its input as state, so concurrent requests must not interleave
+face_net_lock = threading.Lock()
+
+# Encodings of recently seen ID photos, keyed by a hash of the decoded pixels, so a
+# KYC retry with the same ID upload skips the detector and encoder for that side
+ENCODING_CACHE_SIZE = 1024
+_encoding_cache = OrderedDict()
+_encoding_cache_lock = threading.Lock()
+
+
+def detect_face_locations(image: np.ndarray) -> list:
+    """
+    Find faces in an RGB image.
+
+    Returns:
+        list: Face boxes as (top, right, bottom, left) tuples, the format
+        face_recognition.face_encodings expects for known_face_locations
+    """
+    if face_net is None:
+        return face_recognition.face_locations(image, model=FACE_LOCATION_MODEL)
+
+    height, width = image.shape[:2]
+    bgr = cv2.cvtColor(cv2.resize(image, (300, 300)), cv2.COLOR_RGB2BGR)
+    blob = cv2.dnn.blobFromImage(bgr, 1.0, (300, 300), (104.0, 177.0, 123.0))
+    with face_net_lock:
+        face_net.setInput(blob)
+        detections = face_net.forward()
+
+    locations = []
+    for confidence, x1, y1, x2, y2 in detections[0, 0, :, 2:7]:
+        if confidence < settings.FACE_DETECTOR_CONFIDENCE:
+            continue
+        left, top = max(0, int(x1 * width)), max(0, int(y1 * height))
+        right, bottom = min(width, int(x2 * width)), min(height, int(y2 * height))
+        if right > left and bottom > top:
+            locations.append((top, right, bottom, left))
+    return locations
+
+
+def prepare_for_face(image: np.ndarray) -> np.ndarray:
+    """
+    Downscale an RGB image for face detection and make it a contiguous uint8
+    array, which dlib requires.
+    """
+    return np.ascontiguousarray(resize_longest(image, FACE_MAX_SIDE), dtype=np.uint8)
+
+
+def face_encodings(image: np.ndarray) -> list:
+    """
+    Encode every face found in an RGB image.
+    """
+    return face_recognition.face_encodings(image, known_face_locations=detect_face_locations(image))
+
+
+def cached_face_encodings(image: np.ndarray) -> list:
+    """
+    face_encodings with an in-process LRU cache keyed by exact image content.
+
+    The key is a hash of the pixels rather than a perceptual hash: ID cards
+    share most of their layout, and a near-match must never reuse another
+    person's encoding.
+    """
+    key = hashlib.blake2b(np.ascontiguousarray(image), digest_size=16).digest()
+    with _encoding_cache_lock:
+        if key in _encoding_cache:
+            _encoding_cache.move_to_end(key)
+            return _encoding_cache[key]
+
+    encodings = face_encodings(image)
+    with _encoding_cache_lock:
+        _encoding_cache[key] = encodings
+        if len(_encoding_cache) > ENCODING_CACHE_SIZE:
+            _encoding_cache.popitem(last=False)
+    return encodings
+
+
+def warm_up():
+    """
+    Run the detector and the encoder once on a blank frame so the first real
+    request doesn't pay their first-call setup.
+    """
+    dummy = np.zeros((128, 128, 3), np.uint8)
+    detect_face_locations(dummy)
+    face_recognition.face_encodings(dummy, known_face_locations=[(0, 128, 128, 0)])
+
+
+def prepare_gallery(encodings: list):
+    """
+    Stack known encodings for repeated 1:N lookups.
+
+    Do this once when the gallery is loaded; compare_face_to_gallery then only
+    needs one matrix-vector product per query.
+
+    Returns:
+        tuple: (gallery, squared_norms) with shapes (N, 128) and (N,)
+    """
+    gallery = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+    return gallery, (gallery ** 2).sum(axis=1)
+
+
+def compare_face_to_gallery(query: np.ndarray, gallery: np.ndarray, squared_norms: np.ndarray = None):
+    """
+    Find the gallery encoding closest to a query encoding.
+
+    Uses |g|^2 + |q|^2 - 2g.q, so the distances equal face_recognition's
+    Euclidean face_distance and the usual tolerance applies.
+
+    Returns:
+        tuple: (index, distance) of the closest gallery entry, or
+        (None, inf) for an empty gallery
+    """
+    if len(gallery) == 0:
+        return None, float("inf")
+    if squared_norms is None:
+        squared_norms = (gallery ** 2).sum(axis=1)
+    query = np.asarray(query, dtype=np.float32)
+    squared = squared_norms + query @ query - 2 * (gallery @ query)
+    distances = np.sqrt(np.maximum(squared, 0))
+    index = int(distances.argmin())
+    return index, float(distances[index])
+
+
+def best_face_match(known_encodings: list, unknown_encodings: list, tolerance: float = FACE_MATCH_TOLERANCE):
+    """
+    Find the closest pair of faces between two sets of encodings.
+
+    The known faces are treated as a gallery and each unknown face is looked
+    up in it.
+
+    Returns:
+        tuple: (is_match, distance) for the closest pair
+    """
+    gallery, squared_norms = prepare_gallery(known_encodings)
+    distance = min(
+        (compare_face_to_gallery(query, gallery, squared_norms)[1] for query in unknown_encodings),
+        default=float("inf"),
+    )
+    return distance <= tolerance, distance
+
 
 def compare_faces(image1_bytes: bytes, image2_bytes: bytes) -> bool:
     """
     Compare two images and return True if they match.
     """
-    # Load the images into numpy arrays
-    image1 = face_recognition.load_image_file(io.BytesIO(image1_bytes))
-    image2 = face_recognition.load_image_file(io.BytesIO(image2_bytes))
+    # Decode the images into RGB arrays
+    image1 = prepare_for_face(decode_rgb(image1_bytes))
+    image2 = prepare_for_face(decode_rgb(image2_bytes))
 
     # Encode the faces
-    face1_encodings = face_recognition.face_encodings(image1)
-    face2_encodings = face_recognition.face_encodings(image2)
+    face1_encodings = face_encodings(image1)
+    face2_encodings = face_encodings(image2)
 
     if not face1_encodings or not face2_encodings:
         return False  # No faces detected
 
-    match_results = face_recognition.compare_faces([face1_encodings[0]], face2_encodings[0])
-    return bool(match_results[0])  # Convert numpy.bool_ to Python bool
+    is_match, _ = best_face_match(face1_encodings, face2_encodings)
+    return is_match
@@ -0,0 +1,92 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class OCRBatcher:
+    """
+    Merge OCR work from concurrent requests into shared batched forward passes.
+
+    Request threads submit their images and wait on a future. A single
+    background thread collects submissions until max_batch_size images are
+    queued or max_wait seconds have passed since the first one arrived, runs
+    them through run_batch in one call, and hands each request its slice of
+    the results. This keeps a GPU busy under load at the cost of at most
+    max_wait extra latency per request.
+    """
+
+    def __init__(self, run_batch, max_batch_size: int = 8, max_wait: float = 0.05):
+        self._run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._reset()
+        # A forked child (gunicorn --preload) inherits the queue with the parent
+        # collector's waiter still registered on it, so a put() there would wake
+        # a thread that no longer exists; give the child fresh state instead
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def submit(self, images: list) -> Future:
+        """
+        Queue images for OCR.
+
+        Returns:
+            Future: Resolves to one result per image, in input order
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((images, future))
+        return future
+
+    def _ensure_worker(self):
+        # Each process starts its own collector on first use
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._collect_batches, name="ocr-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect_batches(self):
+        while True:
+            pending = [self._queue.get()]
+            image_count = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            while image_count < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                image_count += len(item[0])
+
+            # Drop requests whose caller cancelled the future; the rest can no
+            # longer be cancelled, so setting their results below can't raise
+            pending = [(images, future) for images, future in pending if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+
+            images = [image for request_images, _ in pending for image in request_images]
+            try:
+                results = self._run_batch(images)
+            except BaseException as e:
+                # Fail the waiting requests rather than letting the thread die
+                # and leave them blocked on their futures forever
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_images, future in pending:
+                future.set_result(results[offset:offset + len(request_images)])
+                offset += len(request_images)
@@ -1,22 +1,138 @@
-import easyocr
 import pytesseract
 import numpy as np
 from PIL import Image
 import io
 import re
+import threading
+from typing import Union
+from config import get_settings
+from services._models import get_reader
+from services.ocr_batcher import OCRBatcher
+from utils.image_utils import decode_rgb, letterbox, resize_longest
 
-reader = easyocr.Reader(['en'], gpu=False)  # Use CPU mode by default
+settings = get_settings()
 
-def extract_text_easyocr(image_bytes: bytes):
+# Cap concurrent EasyOCR forward passes so parallel requests don't thrash the CPU/GPU
+ocr_semaphore = threading.BoundedSemaphore(settings.MAX_CONCURRENT_OCR)
+
+# Phone photos are often 4000px wide; ID text stays legible well below that
+OCR_MAX_SIDE = 1280
+
+# readtext_batched needs every image in a batch at one size; landscape images
+# are letterboxed to about the ID-1 card aspect ratio (85.6 x 54 mm) first, so
+# characters are never stretched. The width matches OCR_MAX_SIDE so a card
+# photo keeps the resolution readtext would give it; both sides are multiples
+# of 32, which CRAFT would otherwise pad to.
+OCR_BATCH_WIDTH = 1280
+OCR_BATCH_HEIGHT = 800
+
+# readtext_batched's batch_size is the number of text crops per recognizer
+# pass, not the number of images; one ID side yields a few dozen crops
+OCR_RECOGNIZER_BATCH_SIZE = 32
+
+
+def readtext(image: np.ndarray) -> list:
+    """
+    Run EasyOCR on an image array, waiting for a free OCR slot first.
+    """
+    image = resize_longest(image, OCR_MAX_SIDE)
+    with ocr_semaphore:
+        return get_reader().readtext(image, detail=0)
+
+
+def readtext_batch(images: list) -> list:
+    """
+    Run EasyOCR on several image arrays in one batched detector pass.
+
+    When cross-request batching is enabled the images are merged with those of
+    other in-flight requests first.
+
+    Returns:
+        list: One list of text strings per input image
+    """
+    if ocr_batcher is not None:
+        return ocr_batcher.submit(images).result()
+    return _readtext_batched(images)
+
+
+def _readtext_batched(images: list) -> list:
+    results = [None] * len(images)
+
+    # A portrait photo letterboxed into the landscape canvas would shrink to
+    # OCR_BATCH_HEIGHT tall; OCR it on its own at OCR_MAX_SIDE instead
+    landscape = []
+    for index, image in enumerate(images):
+        if image.shape[0] > image.shape[1]:
+            results[index] = readtext(image)
+        else:
+            landscape.append(index)
+    if not landscape:
+        return results
+
+    # Letterbox here with INTER_AREA; EasyOCR's own resize is a plain bilinear
+    # stretch to n_width x n_height, which becomes a no-op
+    batch = [letterbox(images[index], OCR_BATCH_WIDTH, OCR_BATCH_HEIGHT) for index in landscape]
+    with ocr_semaphore:
+        batch_results = get_reader().readtext_batched(
+            batch,
+            n_width=OCR_BATCH_WIDTH,
+            n_height=OCR_BATCH_HEIGHT,
+            batch_size=OCR_RECOGNIZER_BATCH_SIZE,
+            detail=0,
+        )
+    for index, result in zip(landscape, batch_results):
+        results[index] = result
+    return results
+
+
+# Cross-request micro-batching, enabled with OCR_BATCH_WAIT_MS > 0 (worth it on GPU)
+ocr_batcher = None
+if settings.OCR_BATCH_WAIT_MS > 0:
+    ocr_batcher = OCRBatcher(
+        _readtext_batched,
+        max_batch_size=settings.OCR_BATCH_MAX_SIZE,
+        max_wait=settings.OCR_BATCH_WAIT_MS / 1000,
+    )
+
+
+def warm_up():
+    """
+    Run dummy OCR passes so the first real request doesn't pay PyTorch's
+    lazy initialisation (or cuDNN's algorithm search for the batch shape).
+    """
+    readtext(np.zeros((128, 128, 3), np.uint8))
+    dummy = np.zeros((OCR_BATCH_HEIGHT, OCR_BATCH_WIDTH, 3), np.uint8)
+    # Straight to the model rather than through ocr_batcher, which would start
+    # its collector thread in whichever process runs the warm-up
+    _readtext_batched([dummy, dummy])
+
+
+def extract_text_easyocr(image: Union[bytes, np.ndarray]):
     """
     Extract text using EasyOCR.
+
+    Accepts raw upload bytes or an already decoded RGB array, so callers that
+    also run face recognition on the image only decode it once.
     """
-    image_stream = io.BytesIO(image_bytes)
-    image = Image.open(image_stream).convert('RGB')
-    results = reader.readtext(np.array(image), detail=0)
+    if not isinstance(image, np.ndarray):
+        image = decode_rgb(image)
+    results = readtext(image)
     return " ".join(results)
 
 
+def extract_text_easyocr_batch(images: list) -> list:
+    """
+    Extract text from several images (e.g. both sides of an ID) in one batch.
+
+    Each image may be raw upload bytes or an already decoded RGB array.
+
+    Returns:
+        list: The extracted text for each image, in input order
+    """
+    arrays = [image if isinstance(image, np.ndarray) else decode_rgb(image) for image in images]
+    return [" ".join(results) for results in readtext_batch(arrays)]
+
+
 def extract_text_tesseract(image_bytes: bytes):
     """
     Extract text using pytesseract.
@@ -26,6 +142,25 @@ def extract_text_tesseract(image_bytes: bytes):
     text = pytesseract.image_to_string(image)
     return text.strip()
 
+
+# ID card field patterns, compiled once at import instead of on every parse
+RE_ID_HUDUMA = re.compile(r'id\s*number[\s:]*([a-z0-9]+)', re.IGNORECASE)
+RE_ID_HUDUMA_FALLBACK = re.compile(r'id\s*number[^a-z0-9]*([a-z0-9]{5,})', re.IGNORECASE)
+RE_ID_NATIONAL = re.compile(r'(?:id\s*(?:no\.?|number)?\s*[\s:]+|namba\s*ya\s*kitambulisho[\s:]+)([a-z0-9\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', re.IGNORECASE)
+RE_NAME_HUDUMA = re.compile(r'(?:full\s*names?|jina\s*kamili)[\s:]*([a-z\s]+?)(?=date\s*of\s*birth|dob|sex|$)', re.IGNORECASE)
+RE_SURNAME = re.compile(r'surname[\s:]+([a-z\s-]+?)(?=\s+given|\s+sex|$)', re.IGNORECASE)
+RE_GIVEN_NAME = re.compile(r'given\s*name[\s:]+([a-z\s-]+?)(?=\s+sex|$)', re.IGNORECASE)
+RE_NAME_HUDUMA_FALLBACK = re.compile(r'names?[\s:]*([a-z\s]+?)(?=date\s*of\s*birth|dob|sex|$)', re.IGNORECASE)
+RE_NAME_NATIONAL_FALLBACK = re.compile(r'(?:id\s*[a-z0-9\s]+)([a-z\s]+?)(?=date\s*of\s*birth|dob|$)', re.IGNORECASE)
+RE_DOB = re.compile(r'(?:date\s*of\s*birth|siku\s*ya\s*kuzaliwa|dob)[\s:]+([0-9]{1,2}[.\-/][0-9]{1,2}[.\-/][0-9]{2,4})', re.IGNORECASE)
+RE_GENDER = re.compile(r'(?:sex|jinsia)\s*[\s:]+(male|female|m|f|man|woman|mwanaume|mwanamke)', re.IGNORECASE)
+RE_NATIONALITY = re.compile(r'nationality\s*[\s:]+([a-z\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', re.IGNORECASE)
+RE_DISTRICT = re.compile(r'(?:district\s*of\s*birth|birth\s*district|place\s*of\s*birth|mkoa\s*wa\s*kuzaliwa)\s*[\s:]+([a-z\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', re.IGNORECASE)
+RE_PLACE_OF_ISSUE = re.compile(r'(?:place\s*of\s*issue|issued\s*at|issue\s*place|mkoa\s*wa\s*utoaji)\s*[\s:]+([a-z\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', re.IGNORECASE)
+RE_DATE_OF_ISSUE = re.compile(r'(?:date\s*of\s*issue|issued\s*on|tarehe\s*ya\s*kuandikishwa)[\s:]+([0-9]{1,2}[.\-/][0-9]{1,2}[.\-/][0-9]{2,4})', re.IGNORECASE)
+RE_EXPIRY = re.compile(r'(?:date\s*of\s*expiry|expiry\s*date|tarehe\s*ya\s*kuisha)[\s:]+([0-9]{1,2}[.\-/][0-9]{1,2}[.\-/][0-9]{2,4}|[a-z]+\s*[0-9]{1,2}[.\-/][0-9]{2,4})', re.IGNORECASE)
+
+
 def parse_id_info(ocr_text: str) -> dict:
     """
     Parse important information from ID card OCR text.
@@ -64,12 +199,12 @@ def parse_id_info(ocr_text: str) -> dict:
         # Extract ID Number
         if id_info['document_type'] == 'huduma_card':
             # Special handling for Huduma card ID format
-            id_match = re.search(r'id\s*number[\s:]*([a-z0-9]+)', text, re.IGNORECASE)
+            id_match = RE_ID_HUDUMA.search(text)
             if not id_match:
                 # Fallback if the format is slightly different
-                id_match = re.search(r'id\s*number[^a-z0-9]*([a-z0-9]{5,})', text, re.IGNORECASE)
+                id_match = RE_ID_HUDUMA_FALLBACK.search(text)
         else:  # national_id
-            id_match = re.search(r'(?:id\s*(?:no\.?|number)?\s*[\s:]+|namba\s*ya\s*kitambulisho[\s:]+)([a-z0-9\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', text, re.IGNORECASE)
+            id_match = RE_ID_NATIONAL.search(text)
         
         if id_match:
             id_info['id_number'] = id_match.group(1).strip().upper()
@@ -77,13 +212,13 @@ def parse_id_info(ocr_text: str) -> dict:
         # Extract Full Name
         if id_info['document_type'] == 'huduma_card':
             # Handle Huduma card name format
-            name_match = re.search(r'(?:full\s*names?|jina\s*kamili)[\s:]*([a-z\s]+?)(?=date\s*of\s*birth|dob|sex|$)', text, re.IGNORECASE)
+            name_match = RE_NAME_HUDUMA.search(text)
             if name_match:
                 id_info['full_name'] = ' '.join([word.capitalize() for word in name_match.group(1).strip().split()])
         else:  # national_id
             # Try to get surname and given names
-            surname = re.search(r'surname[\s:]+([a-z\s-]+?)(?=\s+given|\s+sex|$)', text, re.IGNORECASE)
-            given = re.search(r'given\s*name[\s:]+([a-z\s-]+?)(?=\s+sex|$)', text, re.IGNORECASE)
+            surname = RE_SURNAME.search(text)
+            given = RE_GIVEN_NAME.search(text)
             if surname and given:
                 id_info['full_name'] = f"{surname.group(1).strip().title()} {given.group(1).strip().title()}"
         
@@ -91,48 +226,48 @@ def parse_id_info(ocr_text: str) -> dict:
         if not id_info.get('full_name'):
             if id_info['document_type'] == 'huduma_card':
                 # Look for name patterns common in Huduma cards
-                name_match = re.search(r'names?[\s:]*([a-z\s]+?)(?=date\s*of\s*birth|dob|sex|$)', text, re.IGNORECASE)
+                name_match = RE_NAME_HUDUMA_FALLBACK.search(text)
                 if name_match:
                     id_info['full_name'] = ' '.join([word.capitalize() for word in name_match.group(1).strip().split()])
             else:
                 # Fallback for national ID
-                name_match = re.search(r'(?:id\s*[a-z0-9\s]+)([a-z\s]+?)(?=date\s*of\s*birth|dob|$)', text, re.IGNORECASE)
+                name_match = RE_NAME_NATIONAL_FALLBACK.search(text)
                 if name_match:
                     id_info['full_name'] = ' '.join([word.capitalize() for word in name_match.group(1).split()])
         
         # Extract Date of Birth
-        dob_match = re.search(r'(?:date\s*of\s*birth|siku\s*ya\s*kuzaliwa|dob)[\s:]+([0-9]{1,2}[.\-/][0-9]{1,2}[.\-/][0-9]{2,4})', text, re.IGNORECASE)
+        dob_match = RE_DOB.search(text)
         if dob_match:
             id_info['date_of_birth'] = dob_match.group(1).replace(' ', '')
         
         # Extract Gender
-        gender_match = re.search(r'(?:sex|jinsia)\s*[\s:]+(male|female|m|f|man|woman|mwanaume|mwanamke)', text, re.IGNORECASE)
+        gender_match = RE_GENDER.search(text)
         if gender_match:
             gender = gender_match.group(1).lower()
             id_info['gender'] = 'Male' if gender in ['m', 'male', 'man', 'mwanaume'] else 'Female'
         
         # Extract Nationality (for national ID)
-        nat_match = re.search(r'nationality\s*[\s:]+([a-z\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', text, re.IGNORECASE)
+        nat_match = RE_NATIONALITY.search(text)
         if nat_match:
             id_info['nationality'] = nat_match.group(1).strip().title()
         
         # Extract District of Birth
-        district_match = re.search(r'(?:district\s*of\s*birth|birth\s*district|place\s*of\s*birth|mkoa\s*wa\s*kuzaliwa)\s*[\s:]+([a-z\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', text, re.IGNORECASE)
+        district_match = RE_DISTRICT.search(text)
         if district_match:
             id_info['district_of_birth'] = district_match.group(1).strip().title()
         
         # Extract Place of Issue
-        place_match = re.search(r'(?:place\s*of\s*issue|issued\s*at|issue\s*place|mkoa\s*wa\s*utoaji)\s*[\s:]+([a-z\s]+?)(?=\s+[a-z]+\s*[\s:]|$)', text, re.IGNORECASE)
+        place_match = RE_PLACE_OF_ISSUE.search(text)
         if place_match:
             id_info['place_of_issue'] = place_match.group(1).strip().title()
         
         # Extract Date of Issue
-        issue_date_match = re.search(r'(?:date\s*of\s*issue|issued\s*on|tarehe\s*ya\s*kuandikishwa)[\s:]+([0-9]{1,2}[.\-/][0-9]{1,2}[.\-/][0-9]{2,4})', text, re.IGNORECASE)
+        issue_date_match = RE_DATE_OF_ISSUE.search(text)
         if issue_date_match:
             id_info['date_of_issue'] = issue_date_match.group(1).replace(' ', '')
         
         # Extract Expiry Date (for national ID)
-        expiry_match = re.search(r'(?:date\s*of\s*expiry|expiry\s*date|tarehe\s*ya\s*kuisha)[\s:]+([0-9]{1,2}[.\-/][0-9]{1,2}[.\-/][0-9]{2,4}|[a-z]+\s*[0-9]{1,2}[.\-/][0-9]{2,4})', text, re.IGNORECASE)
+        expiry_match = RE_EXPIRY.search(text)
         if expiry_match:
             id_info['expiry_date'] = expiry_match.group(1).replace(' ', '')
         
@@ -143,4 +278,3 @@ def parse_id_info(ocr_text: str) -> dict:
         id_info['error'] = f"Error during parsing: {str(e)}"
         return {k: v for k, v in id_info.items() if v is not None}
 
-# Add regex module import at the top of the file
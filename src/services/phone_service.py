@@ -1,11 +1,57 @@
+import functools
+import re
+
 import phonenumbers
 from phonenumbers import geocoder, carrier, NumberParseException
 
+# Kenyan mobile numbers in the plain forms users type: +2547XXXXXXXX,
+# 2547XXXXXXXX, 07XXXXXXXX or 7XXXXXXXX (and the 01 range). [0-9] rather than \d,
+# which would also accept non-ASCII digits that phonenumbers normalises.
+RE_KE_MOBILE = re.compile(r'(\+254|254|0)?([17][0-9]{8})')
+
+# Carrier for each three-digit KE mobile prefix, taken from the phonenumbers
+# metadata. Only prefixes that are valid throughout and belong to a single
+# carrier are listed; every other number goes through phonenumbers.
+_KE_CARRIER_RANGES = {
+    "Safaricom": [(110, 115), (700, 729), (740, 743), (745, 746), (748, 749),
+                  (757, 759), (768, 769), (790, 799)],
+    "Airtel": [(100, 106), (730, 739), (750, 756), (761, 762), (780, 789)],
+    "Telkom": [(120, 120), (770, 779)],
+}
+KE_MOBILE_PREFIXES = {
+    str(prefix): name
+    for name, ranges in _KE_CARRIER_RANGES.items()
+    for start, end in ranges
+    for prefix in range(start, end + 1)
+}
+
+
+# Longest input phonenumbers will parse; longer (user-controlled) strings are
+# validated without the cache so they can't be held in memory
+MAX_CACHED_INPUT_LENGTH = 250
+
+
 def validate_phone_number(phone_number: str, region: str = "KE") -> dict:
     """
     Validate and extract information about a phone number.
     Default region: Kenya (KE).
     """
+    if len(phone_number) > MAX_CACHED_INPUT_LENGTH:
+        return _validate_phone_number.__wrapped__(phone_number, region)
+    # Copy so callers can't mutate the cached result
+    return dict(_validate_phone_number(phone_number, region))
+
+
+@functools.lru_cache(maxsize=10_000)
+def _validate_phone_number(phone_number: str, region: str) -> dict:
+    """
+    Parse a phone number once per (number, region); retries and repeat
+    submissions reuse the cached result.
+    """
+    result = _validate_ke_mobile(phone_number, region)
+    if result is not None:
+        return result
+
     try:
         parsed = phonenumbers.parse(phone_number, region)
         is_valid = phonenumbers.is_valid_number(parsed)
@@ -15,6 +61,7 @@ def validate_phone_number(phone_number: str, region: str = "KE") -> dict:
             "input": phone_number,
             "international_format": phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
             "national_format": phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.NATIONAL),
+            "e164_format": phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164),
             "country_code": parsed.country_code,
             "region_code": geocoder.region_code_for_number(parsed),
             "carrier": carrier.name_for_number(parsed, "en"),
@@ -25,3 +72,36 @@ def validate_phone_number(phone_number: str, region: str = "KE") -> dict:
         return result
     except NumberParseException as e:
         return {"error": f"Invalid number format: {str(e)}"}
+
+
+def _validate_ke_mobile(phone_number: str, region: str):
+    """
+    Validate a Kenyan mobile number from the prefix table without going
+    through phonenumbers.
+
+    Returns:
+        dict | None: The same fields phonenumbers would produce, or None if
+        the number isn't a plain KE mobile number with a known prefix
+    """
+    match = RE_KE_MOBILE.fullmatch(phone_number)
+    if match is None:
+        return None
+    country_prefix, subscriber = match.groups()
+    # Without a default region only the +254 form can be read as Kenyan
+    if region != "KE" and country_prefix != "+254":
+        return None
+    carrier_name = KE_MOBILE_PREFIXES.get(subscriber[:3])
+    if carrier_name is None:
+        return None
+
+    return {
+        "input": phone_number,
+        "international_format": f"+254 {subscriber[:3]} {subscriber[3:]}",
+        "national_format": f"0{subscriber[:3]} {subscriber[3:]}",
+        "e164_format": f"+254{subscriber}",
+        "country_code": 254,
+        "region_code": "KE",
+        "carrier": carrier_name,
+        "is_valid": True,
+        "is_possible": True,
+    }
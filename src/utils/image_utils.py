@@ -0,0 +1,87 @@
+import math
+import mmap
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+
+def read_upload(file_storage):
+    """
+    Return the contents of an uploaded file without copying them where possible.
+
+    Werkzeug spools large uploads to a temporary file on disk; those are
+    memory-mapped so decoding reads straight from the page cache. Uploads
+    still held in memory are small and are returned with read(), which
+    usually copies them.
+
+    Returns:
+        bytes | mmap.mmap: A buffer that cv2.imdecode can read via np.frombuffer
+    """
+    stream = file_storage.stream
+    # _rolled is private to SpooledTemporaryFile; without it, fall back to read()
+    if isinstance(stream, tempfile.SpooledTemporaryFile) and getattr(stream, "_rolled", False):
+        fileno = stream.fileno()
+        if os.fstat(fileno).st_size > 0:
+            return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    return file_storage.read()
+
+
+def release_upload(buffer):
+    """
+    Unmap a buffer returned by read_upload once the request is done with it.
+    """
+    if isinstance(buffer, mmap.mmap):
+        try:
+            buffer.close()
+        except BufferError:
+            # A worker abandoned by an early error response still holds a view;
+            # the mapping is released when that view is garbage-collected
+            pass
+
+
+def decode_rgb(image_bytes: bytes) -> np.ndarray:
+    """
+    Decode an uploaded image into an RGB uint8 array.
+
+    Decode each upload once and pass the array to OCR and face recognition,
+    instead of decoding the same bytes again for each model.
+    """
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def resize_longest(image: np.ndarray, max_side: int) -> np.ndarray:
+    """
+    Scale an image so its longest edge is at most max_side pixels.
+
+    Uses area interpolation when shrinking, which avoids moire on photos.
+    Images already within the limit are returned unchanged.
+    """
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def letterbox(image: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Scale an image to exactly width x height without distorting it.
+
+    The image is first padded with black on the bottom and right to the
+    target aspect ratio, then resized with area interpolation when shrinking.
+    """
+    image_height, image_width = image.shape[:2]
+    canvas_width = max(image_width, math.ceil(image_height * width / height))
+    canvas_height = max(image_height, math.ceil(image_width * height / width))
+    image = cv2.copyMakeBorder(
+        image, 0, canvas_height - image_height, 0, canvas_width - image_width,
+        cv2.BORDER_CONSTANT, value=0,
+    )
+    interpolation = cv2.INTER_AREA if canvas_width > width else cv2.INTER_LINEAR
+    return cv2.resize(image, (width, height), interpolation=interpolation)
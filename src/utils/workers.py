@@ -0,0 +1,50 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from config import get_settings
+
+
+def available_cores() -> int:
+    """
+    Count the CPU cores this process may use.
+
+    Unlike os.cpu_count(), this honours the CPU affinity mask and a container's
+    cgroup CPU quota (v2 cpu.max or v1 cpu.cfs_quota_us).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+
+    for quota_file, period_file in (
+        ("/sys/fs/cgroup/cpu.max", None),
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+    ):
+        try:
+            with open(quota_file) as f:
+                values = f.read().split()
+            if period_file is not None:
+                with open(period_file) as f:
+                    values.append(f.read().strip())
+            quota, period = values[0], values[1]
+            if quota not in ("max", "-1"):
+                cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+            break
+        except (OSError, ValueError, IndexError):
+            continue
+    return cores
+
+
+def cores_per_process() -> int:
+    """
+    Share of the available cores for one of the WEB_CONCURRENCY server processes.
+    """
+    return max(1, available_cores() // get_settings().WEB_CONCURRENCY)
+
+
+# Shared pool for OpenCV/dlib/EasyOCR work. Sized to this process's share of the
+# cores because main.py pins OpenCV and the BLAS/OpenMP pools to one thread, so N
+# workers keep N cores busy; torch instead gets cores // MAX_CONCURRENT_OCR
+# threads, matching the number of OCR passes allowed to run at once.
+CV_POOL = ThreadPoolExecutor(max_workers=cores_per_process(), thread_name_prefix="cv")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports from src/ (e.g. "from services.ocr_batcher import OCRBatcher")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+face_recognition = pytest.importorskip("face_recognition")
+pytest.importorskip("cv2")
+
+from services.face_service import best_face_match, compare_face_to_gallery, prepare_gallery
+
+
+def random_encodings(count, seed=0):
+    # dlib encodings are 128 floats, roughly in [-0.3, 0.3] and not unit-length
+    return list(np.random.default_rng(seed).uniform(-0.3, 0.3, (count, 128)))
+
+
+def test_gallery_lookup_matches_face_distance():
+    known = random_encodings(500)
+    query = random_encodings(1, seed=1)[0]
+    gallery, squared_norms = prepare_gallery(known)
+
+    index, distance = compare_face_to_gallery(query, gallery, squared_norms)
+
+    expected = face_recognition.face_distance(known, query)
+    assert index == int(expected.argmin())
+    assert distance == pytest.approx(expected.min(), abs=1e-4)
+
+
+def test_gallery_lookup_finds_an_exact_match():
+    known = random_encodings(10)
+    gallery, squared_norms = prepare_gallery(known)
+
+    index, distance = compare_face_to_gallery(known[7], gallery, squared_norms)
+
+    assert index == 7
+    assert distance == pytest.approx(0, abs=1e-3)
+
+
+def test_empty_gallery_has_no_match():
+    gallery, squared_norms = prepare_gallery([])
+
+    assert compare_face_to_gallery(random_encodings(1)[0], gallery, squared_norms) == (None, float("inf"))
+    assert best_face_match([], random_encodings(1)) == (False, float("inf"))
+
+
+def test_best_face_match_uses_the_closest_pair():
+    known = random_encodings(3)
+    unknown = random_encodings(2, seed=1)
+
+    is_match, distance = best_face_match(known, unknown)
+
+    expected = min(face_recognition.face_distance(known, face).min() for face in unknown)
+    assert distance == pytest.approx(expected, abs=1e-4)
+    assert is_match == (expected <= 0.6)
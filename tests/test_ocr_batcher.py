@@ -0,0 +1,77 @@
+import os
+import time
+
+import pytest
+
+from services.ocr_batcher import OCRBatcher
+
+
+class BatchAborted(BaseException):
+    pass
+
+
+def make_batcher(run_batch, max_batch_size=5):
+    # A long wait, so batches are closed by max_batch_size rather than timing
+    return OCRBatcher(run_batch, max_batch_size=max_batch_size, max_wait=5)
+
+
+def test_merged_requests_get_their_own_results_in_order():
+    calls = []
+
+    def run_batch(images):
+        calls.append(list(images))
+        return [image * 10 for image in images]
+
+    batcher = make_batcher(run_batch)
+    futures = [batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([4, 5])]
+
+    assert [future.result(timeout=5) for future in futures] == [[10, 20], [30], [40, 50]]
+    assert calls == [[1, 2, 3, 4, 5]]
+
+
+def test_errors_reach_every_request_in_the_batch():
+    def run_batch(images):
+        raise ValueError("model failed")
+
+    batcher = make_batcher(run_batch, max_batch_size=2)
+    futures = [batcher.submit(["front"]), batcher.submit(["back"])]
+
+    for future in futures:
+        with pytest.raises(ValueError, match="model failed"):
+            future.result(timeout=5)
+
+
+def test_base_exception_fails_the_batch_and_keeps_the_worker_alive():
+    failures = [BatchAborted()]
+
+    def run_batch(images):
+        if failures:
+            raise failures.pop()
+        return images
+
+    batcher = make_batcher(run_batch, max_batch_size=1)
+
+    with pytest.raises(BatchAborted):
+        batcher.submit(["first"]).result(timeout=5)
+    assert batcher.submit(["second"]).result(timeout=5) == ["second"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_gets_a_working_batcher():
+    batcher = make_batcher(lambda images: images, max_batch_size=1)
+    # Leaves the parent's collector parked on the queue, as a preloading master would
+    assert batcher.submit(["parent"]).result(timeout=5) == ["parent"]
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            # Let the child's collector park on the queue before anything is put
+            batcher._ensure_worker()
+            time.sleep(0.2)
+            ok = batcher.submit(["child"]).result(timeout=2) == ["child"]
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("phonenumbers")
+
+from services import phone_service
+from services.phone_service import KE_MOBILE_PREFIXES, _validate_ke_mobile
+
+
+def library_result(phone_number, region, monkeypatch):
+    # Same call with the prefix-table fast path disabled
+    phone_service._validate_phone_number.cache_clear()
+    with monkeypatch.context() as patch:
+        patch.setattr(phone_service, "_validate_ke_mobile", lambda *args: None)
+        result = phone_service._validate_phone_number(phone_number, region)
+    phone_service._validate_phone_number.cache_clear()
+    return result
+
+
+@pytest.mark.parametrize("prefix", sorted(KE_MOBILE_PREFIXES))
+def test_fast_path_matches_phonenumbers(prefix, monkeypatch):
+    subscriber = prefix + "345678"
+    cases = [
+        ("+254" + subscriber, "KE"),
+        ("254" + subscriber, "KE"),
+        ("0" + subscriber, "KE"),
+        (subscriber, "KE"),
+        ("+254" + subscriber, None),
+    ]
+    for phone_number, region in cases:
+        fast = _validate_ke_mobile(phone_number, region)
+        assert fast is not None, (phone_number, region)
+        assert fast == library_result(phone_number, region, monkeypatch), (phone_number, region)
+
+
+@pytest.mark.parametrize("phone_number, region", [
+    ("0712٣٤٥٦٧٨", "KE"),  # non-ASCII digits
+    ("0712 345 678", "KE"),  # formatting is left to phonenumbers
+    ("0712345678", None),  # no region to read a national number in
+    ("254712345678", None),
+    ("0760345678", "KE"),  # prefix not in the table
+    ("+255712345678", None),
+])
+def test_other_inputs_fall_back_to_phonenumbers(phone_number, region, monkeypatch):
+    assert _validate_ke_mobile(phone_number, region) is None
+
+    phone_service._validate_phone_number.cache_clear()
+    assert phone_service._validate_phone_number(phone_number, region) == library_result(phone_number, region, monkeypatch)
+
+
+def test_oversized_input_is_not_cached():
+    phone_service._validate_phone_number.cache_clear()
+
+    result = phone_service.validate_phone_number("1" * 10_000, "KE")
+
+    assert "error" in result
+    assert phone_service._validate_phone_number.cache_info().currsize == 0